@@ -1,15 +1,39 @@
 # --------------------------------##-----imports --------#
 import io
 import os
+import copy
+import re
+import stat
 import sys
 import time
 import json
+import hmac
+import secrets
+import random
+import platform
+import tempfile
+import queue
+import hashlib
+import mmap
+import zlib
+import struct
+import select
 import shutil
+import ctypes
+import ctypes.util
 import zipfile
+import argparse
+import functools
+import collections
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from array import array
 from pathlib import Path
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
 # Optional previews (graceful fallback)
 try:
@@ -33,6 +57,12 @@ class AppConfig:
     APP_NAME = "Polyglot File Combiner"
     APP_VER = "1.0"  # Update as needed
     CONFIG_PATH = Path.home() / "polyglot_combiner.json"
+    THUMB_CACHE_DIR = Path.home() / ".polyglot_combiner_thumbs"
+    THUMB_SIZE = 96
+    THUMB_CACHE_MAX_FILES = 5000
+    THUMB_CACHE_MAX_BYTES = 200 * 1024 * 1024
+    CALIBRATION_PATH = Path.home() / "polyglot_combiner_calibration.json"
+    SERVICE_TOKEN_PATH = Path.home() / ".polyglot_combiner_service.token"
 
     SUPPORTED_TYPES = {
         "PDF": [".pdf"], "ZIP": [".zip"], "JPEG": [".jpg", ".jpeg"],
@@ -56,15 +86,102 @@ exit /b 0
 Write-Host "$($MyInvocation.MyCommand.Name) has a ZIP payload at the end. Open with an unzip tool."
 exit 0
 """, "POSIX sh (.sh)": r"""#!/bin/sh
-echo "$(basename "$0") has a ZIP payload at the end. Open with an unzip tool."
+# Self-extracting archive. Usage: sh "$0" [destination]
+# The ZIP payload starts at byte @PAYLOAD_OFFSET@ and is @PAYLOAD_SIZE@ bytes long (filled in at build time).
+OFFSET=@PAYLOAD_OFFSET@
+dest="${1:-$(basename "$0")_extracted}"
+mkdir -p "$dest" || exit 1
+if command -v bsdtar >/dev/null 2>&1; then
+    tail -c +$((OFFSET + 1)) "$0" | bsdtar -xf - -C "$dest" || exit 1
+else
+    tmp="${TMPDIR:-/tmp}/sfx.$$.zip"
+    trap 'rm -f "$tmp"' EXIT
+    tail -c +$((OFFSET + 1)) "$0" > "$tmp" && unzip -oq "$tmp" -d "$dest" || exit 1
+fi
+echo "Extracted to $dest"
 exit 0
 """, "Bash (.bash)": r"""#!/usr/bin/env bash
-echo "$(basename "$0") has a ZIP payload at the end. Open with an unzip tool."
+# Self-extracting archive. Usage: bash "$0" [destination]
+# The ZIP payload starts at byte @PAYLOAD_OFFSET@ and is @PAYLOAD_SIZE@ bytes long (filled in at build time).
+OFFSET=@PAYLOAD_OFFSET@
+dest="${1:-$(basename "$0")_extracted}"
+mkdir -p "$dest" || exit 1
+if command -v bsdtar >/dev/null 2>&1; then
+    tail -c +$((OFFSET + 1)) "$0" | bsdtar -xf - -C "$dest" || exit 1
+else
+    tmp="$(mktemp)" || exit 1
+    trap 'rm -f "$tmp"' EXIT
+    tail -c +$((OFFSET + 1)) "$0" > "$tmp" && unzip -oq "$tmp" -d "$dest" || exit 1
+fi
+echo "Extracted to $dest"
 exit 0
-""", "Python (.py)": r"""# Self-extract notice
-print(f"{__file__} has a ZIP payload at the end. Open with an unzip tool.")
+""", "Python (.py)": r"""#!/usr/bin/env python3
+# Self-extracting archive. Usage: python3 <this file> [destination]
+# Python runs the copy of this stub stored as __main__.py in the ZIP payload, which
+# starts at byte @PAYLOAD_OFFSET@ (filled in at build time). Entries are extracted in parallel.
+import os
+import sys
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+OFFSET = @PAYLOAD_OFFSET@
+
+
+class PayloadView:
+    '''Read-only file view starting at OFFSET, so zipfile sees a plain archive.'''
+
+    def __init__(self, path):
+        self.f = open(path, "rb")
+
+    def seek(self, pos, whence=0):
+        return self.f.seek(pos + OFFSET if whence == 0 else pos, whence) - OFFSET
+
+    def tell(self):
+        return self.f.tell() - OFFSET
+
+    def read(self, n=-1):
+        return self.f.read(n)
+
+    def seekable(self):
+        return True
+
+    def close(self):
+        self.f.close()
+
+
+def extract(names, dest):
+    view = PayloadView(sys.argv[0])
+    try:
+        with zipfile.ZipFile(view) as zf:
+            for name in names: zf.extract(name, dest)
+    finally:
+        view.close()
+
+
+def main():
+    dest = sys.argv[1] if len(sys.argv) > 1 else os.path.basename(sys.argv[0]) + "_extracted"
+    view = PayloadView(sys.argv[0])
+    with zipfile.ZipFile(view) as zf:
+        names = [n for n in zf.namelist() if n != "__main__.py"]
+    view.close()
+    os.makedirs(dest, exist_ok=True)  # zipfile's own makedirs races when several threads create it at once
+    workers = max(1, min(8, os.cpu_count() or 2, len(names)))
+    with ThreadPoolExecutor(workers) as pool:
+        list(pool.map(lambda part: extract(part, dest), [names[i::workers] for i in range(workers)]))
+    print(f"Extracted {len(names)} file(s) to {dest}")
+
+
+if __name__ == "__main__":
+    main()
 """
     }
+    # Placeholders in script stubs, replaced by write_script_zip
+    PAYLOAD_OFFSET_TOKEN = "@PAYLOAD_OFFSET@"
+    PAYLOAD_SIZE_TOKEN = "@PAYLOAD_SIZE@"
+    # Reproducible payload builds: fixed timestamp, permissions and compression level
+    REPRO_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+    REPRO_FILE_MODE = 0o644
+    REPRO_COMPRESSLEVEL = 9
     COMBINATIONS = [
         {"label": "TXT + Images", "primary": "TXT", "secondaries": ["JPEG", "PNG", "GIF"], "strategy": "ZIP-last"},
         {"label": "PDF + Images", "primary": "PDF", "secondaries": ["JPEG", "PNG", "GIF"], "strategy": "ZIP-last"},
@@ -225,15 +342,231 @@ def filters_for(type_name: str) -> List[Tuple[str, str]]:
     return [(f"{type_name}", pat), ("All files", "*.*")]
 
 
+# --------------------------------##-----Selection State --------#
+class SelectionStore:
+    """Column-oriented file selection: one ``str`` per path plus packed size/mtime/type/identity arrays.
+
+    Each file is stat'ed once when added; duplicates (same device and inode) are rejected in O(1).
+    Where the filesystem reports no inode number (``st_ino == 0``, e.g. some Windows filesystems) the
+    normalized absolute path is used as the file key instead.
+    """
+    TYPES = list(AppConfig.SUPPORTED_TYPES) + ["UNKNOWN"]
+
+    def __init__(self):
+        self._paths: List[str] = []
+        self._sizes = array("q");
+        self._mtimes = array("d");
+        self._types = array("B")
+        self._devs = array("Q");
+        self._inodes = array("Q")
+        self._seen = set()
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+    @staticmethod
+    def _file_key(path: str, dev: int, ino: int) -> Union[Tuple[int, int], str]:
+        return (dev, ino) if ino else os.path.normcase(os.path.abspath(path))
+
+    @staticmethod
+    def identity(path) -> Optional[Union[Tuple[int, int], str]]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return SelectionStore._file_key(os.fspath(path), st.st_dev, st.st_ino)
+
+    def add(self, paths: Iterable[str], type_name: Optional[str] = None,
+            exclude: Optional[Union[Tuple[int, int], str]] = None) -> int:
+        """Adds regular files, skipping duplicates and ``exclude`` (an identity() key); returns how many were added."""
+        fixed_code = self.TYPES.index(type_name) if type_name else None
+        added = 0
+        for path in paths:
+            path = os.fspath(path)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            key = self._file_key(path, st.st_dev, st.st_ino)
+            if not stat.S_ISREG(st.st_mode) or key in self._seen or key == exclude: continue
+            self._seen.add(key)
+            self._paths.append(path)
+            self._sizes.append(st.st_size); self._mtimes.append(st.st_mtime)
+            self._devs.append(st.st_dev); self._inodes.append(st.st_ino)
+            self._types.append(fixed_code if fixed_code is not None else self.TYPES.index(detect_type(Path(path))))
+            added += 1
+        return added
+
+    def _keep(self, keep: List[int]):
+        self._paths = [self._paths[i] for i in keep]
+        for name in ("_sizes", "_mtimes", "_types", "_devs", "_inodes"):
+            col = getattr(self, name)
+            setattr(self, name, array(col.typecode, (col[i] for i in keep)))
+        self._seen = {self._file_key(p, dev, ino) for p, dev, ino in zip(self._paths, self._devs, self._inodes)}
+
+    def remove_indices(self, indices: Iterable[int]):
+        drop = set(indices)
+        self._keep([i for i in range(len(self._paths)) if i not in drop])
+
+    def clear(self, type_name: Optional[str] = None):
+        if type_name is None:
+            self._keep([])
+        else:
+            self._keep([i for i, t in enumerate(self._types) if t != self.TYPES.index(type_name)])
+
+    def indices(self, type_name: Optional[str] = None) -> List[int]:
+        if type_name is None: return list(range(len(self._paths)))
+        code = self.TYPES.index(type_name)
+        return [i for i, t in enumerate(self._types) if t == code]
+
+    def path_at(self, i: int) -> str:
+        return self._paths[i]
+
+    def paths(self, type_name: Optional[str] = None) -> Iterator[str]:
+        return (self._paths[i] for i in self.indices(type_name))
+
+    def records(self, type_name: Optional[str] = None) -> Iterator[Tuple[str, int, float, str]]:
+        """Yields (path, size, mtime, type) tuples."""
+        return ((self._paths[i], self._sizes[i], self._mtimes[i], self.TYPES[self._types[i]])
+                for i in self.indices(type_name))
+
+    def count(self, type_name: Optional[str] = None) -> int:
+        return len(self.indices(type_name)) if type_name else len(self._paths)
+
+    def total_size(self, type_name: Optional[str] = None) -> int:
+        return sum(self._sizes) if type_name is None else sum(self._sizes[i] for i in self.indices(type_name))
+
+    def types(self) -> List[str]:
+        return [self.TYPES[code] for code in sorted(set(self._types))]
+
+    def pairs(self) -> List[Tuple[str, Path]]:
+        """(arcname, path) pairs for FileCombiner.create_zip_payload."""
+        return [(os.path.basename(p), Path(p)) for p in self._paths]
+
+    def summary(self, type_name: str) -> str:
+        idx = self.indices(type_name)
+        if not idx: return "— none —"
+        text = ", ".join(os.path.basename(self._paths[i]) for i in idx[:3])
+        return text + (f" (+{len(idx) - 3} more)" if len(idx) > 3 else "")
+
+
 # --------------------------------##-----File Operation Logic --------#
 class FileCombiner:
     @staticmethod
-    def create_zip_payload(pairs: List[Tuple[str, Path]]) -> bytes:
+    def create_zip_payload(pairs: List[Tuple[str, Path]], reproducible: bool = False) -> bytes:
         bio = io.BytesIO()
         with zipfile.ZipFile(bio, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-            for arcname, p in pairs: zf.write(p, arcname)
+            for arcname, p in FileCombiner._ordered(pairs, reproducible):
+                FileCombiner._write_entry(zf, arcname, p, reproducible)
         return bio.getvalue()
 
+    @staticmethod
+    def splice_zip_payload(pairs: List[Tuple[str, Path]], previous_output: Path, changed: Set[str],
+                           reproducible: bool = False) -> Tuple[bytes, int]:
+        """Like create_zip_payload, but copies the still-valid compressed entries of a previous output verbatim.
+
+        An entry is reused when its source is not in ``changed`` (absolute paths) and its size (and, outside
+        reproducible mode, its timestamp) still matches. Returns the payload and the number of reused entries.
+        """
+        bio, reused = io.BytesIO(), 0
+        with zipfile.ZipFile(previous_output, "r") as old, \
+                zipfile.ZipFile(bio, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            old_infos = {info.filename: info for info in old.infolist()}
+            for arcname, p in FileCombiner._ordered(pairs, reproducible):
+                info, st = old_infos.get(arcname), p.stat()
+                stamp = AppConfig.REPRO_DATE_TIME if reproducible else time.localtime(st.st_mtime)[:6]
+                stamp = stamp[:5] + (stamp[5] // 2 * 2,)  # ZIP stores seconds at 2-second resolution
+                if (info is not None and os.path.abspath(p) not in changed and info.file_size == st.st_size
+                        and info.date_time == stamp and info.compress_size < zipfile.ZIP64_LIMIT):
+                    FileCombiner._copy_raw_entry(old, info, zf); reused += 1
+                else:
+                    FileCombiner._write_entry(zf, arcname, p, reproducible)
+        return bio.getvalue(), reused
+
+    @staticmethod
+    def _ordered(pairs: List[Tuple[str, Path]], reproducible: bool) -> List[Tuple[str, Path]]:
+        return sorted(pairs, key=lambda pair: pair[0]) if reproducible else list(pairs)
+
+    @staticmethod
+    def _write_entry(zf: zipfile.ZipFile, arcname: str, p: Path, reproducible: bool):
+        if not reproducible: zf.write(p, arcname); return
+        info = zipfile.ZipInfo(arcname, AppConfig.REPRO_DATE_TIME)  # normalized metadata: identical inputs, identical bytes
+        info.create_system = 3
+        info.external_attr = AppConfig.REPRO_FILE_MODE << 16
+        info.compress_type = zipfile.ZIP_DEFLATED
+        info._compresslevel = AppConfig.REPRO_COMPRESSLEVEL  # what writestr(compresslevel=...) sets
+        info.file_size = p.stat().st_size  # lets zipfile decide on ZIP64 up front
+        with p.open("rb") as src, zf.open(info, "w") as dst: shutil.copyfileobj(src, dst, 1024 * 1024)
+
+    @staticmethod
+    def _copy_raw_entry(src: zipfile.ZipFile, info: zipfile.ZipInfo, dst: zipfile.ZipFile):
+        """Appends an entry's compressed bytes to ``dst`` without decompressing them."""
+        src.fp.seek(info.header_offset)
+        name_len, extra_len = struct.unpack("<HH", src.fp.read(zipfile.sizeFileHeader)[26:30])
+        src.fp.seek(info.header_offset + zipfile.sizeFileHeader + name_len + extra_len)
+        raw = src.fp.read(info.compress_size)
+        entry = copy.copy(info)
+        entry.flag_bits &= ~0x08  # sizes and CRC go in the local header, no trailing data descriptor
+        entry.header_offset = dst.fp.tell()
+        dst.fp.write(entry.FileHeader())
+        dst.fp.write(raw)
+        dst.filelist.append(entry)
+        dst.NameToInfo[entry.filename] = entry
+        dst.start_dir = dst.fp.tell()
+
+    @staticmethod
+    def build(strategy: str, primary_path: Optional[Path], pairs: List[Tuple[str, Path]], output_path: Path,
+              stub_text: str = "", reproducible: bool = False, changed: Optional[Set[str]] = None) -> dict:
+        """Builds the output for a ZIP-last or Script+ZIP strategy and returns its size and SHA-256.
+
+        In reproducible mode the digest is computed before writing, and an existing output with the
+        same digest is left untouched (``skipped`` is True). Passing ``changed`` (absolute paths of
+        modified inputs) reuses unchanged compressed entries from the existing output.
+        """
+        zip_payload, reused, head = None, 0, b""
+        if changed is not None and output_path.is_file():
+            try:
+                zip_payload, reused = FileCombiner.splice_zip_payload(pairs, output_path, changed, reproducible)
+            except (zipfile.BadZipFile, OSError, struct.error):
+                zip_payload = None
+        if zip_payload is None: zip_payload = FileCombiner.create_zip_payload(pairs, reproducible)
+        digest = hashlib.sha256()
+        if strategy == "ZIP-last":
+            if primary_path: FileCombiner._hash_file(primary_path, digest)
+        else:
+            head, zip_payload = FileCombiner.embed_payload(stub_text, zip_payload, output_path.suffix.lower() == ".py")
+            digest.update(head)
+        digest.update(zip_payload)
+        result = {"output": str(output_path), "sha256": digest.hexdigest(), "skipped": False,
+                  "entries": len(pairs), "reused": reused}
+        if reproducible and output_path.is_file() and FileCombiner.file_digest(output_path) == result["sha256"]:
+            result.update(skipped=True, size=output_path.stat().st_size)
+            return result
+        if strategy == "ZIP-last":
+            if primary_path:
+                FileCombiner.write_zip_last(primary_path, zip_payload, output_path)
+            else:
+                output_path.write_bytes(zip_payload)
+        else:
+            with output_path.open("wb") as out: out.write(head); out.write(zip_payload)
+        result["size"] = output_path.stat().st_size
+        return result
+
+    @staticmethod
+    def file_digest(p: Path) -> str:
+        return FileCombiner._hash_file(p, hashlib.sha256()).hexdigest()
+
+    @staticmethod
+    def _hash_file(p: Path, digest):
+        with p.open("rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""): digest.update(block)
+        return digest
+
+    @staticmethod
+    def _stub_bytes(stub_text: str, encoding="utf-8") -> bytes:
+        data = stub_text.encode(encoding, errors="replace")
+        return data if stub_text.endswith("\n") else data + b"\n"
+
     @staticmethod
     def write_zip_last(primary_path: Path, zip_payload: bytes, output_path: Path):
         with primary_path.open("rb") as src, output_path.open("wb") as out:
@@ -242,11 +575,948 @@ class FileCombiner:
 
     @staticmethod
     def write_script_zip(stub_text: str, zip_payload: bytes, output_path: Path, encoding="utf-8"):
+        head, zip_payload = FileCombiner.embed_payload(stub_text, zip_payload, output_path.suffix.lower() == ".py",
+                                                       encoding)
         with output_path.open("wb") as out:
-            out.write(stub_text.encode(encoding, errors="replace"))
-            if not stub_text.endswith("\n"): out.write(b"\n")
+            out.write(head)
             out.write(zip_payload)
 
+    @staticmethod
+    def embed_payload(stub_text: str, zip_payload: bytes, python_main: bool = False,
+                      encoding="utf-8") -> Tuple[bytes, bytes]:
+        """Fills the payload offset/size placeholders of a stub and returns (stub bytes, payload).
+
+        With ``python_main`` the filled-in stub is also stored as the payload's ``__main__.py``, so
+        ``python output.py`` runs it (Python executes a file that is a ZIP archive via its __main__.py).
+        The placeholders change the stub's length, so substitution repeats until the values are stable.
+        """
+        offset, size = 0, len(zip_payload)
+        for _ in range(10):
+            text = stub_text.replace(AppConfig.PAYLOAD_OFFSET_TOKEN, str(offset)).replace(
+                AppConfig.PAYLOAD_SIZE_TOKEN, str(size))
+            head = FileCombiner._stub_bytes(text, encoding)
+            payload = FileCombiner._add_main_module(zip_payload, head) if python_main else zip_payload
+            if (len(head), len(payload)) == (offset, size): break
+            offset, size = len(head), len(payload)
+        return head, payload
+
+    @staticmethod
+    def _add_main_module(zip_payload: bytes, source: bytes) -> bytes:
+        bio = io.BytesIO(zip_payload)
+        with zipfile.ZipFile(bio, "a", compression=zipfile.ZIP_DEFLATED) as zf:
+            info = zipfile.ZipInfo("__main__.py", AppConfig.REPRO_DATE_TIME)
+            info.create_system = 3
+            info.external_attr = AppConfig.REPRO_FILE_MODE << 16
+            zf.writestr(info, source, compress_type=zipfile.ZIP_DEFLATED)
+        return bio.getvalue()
+
+
+# --------------------------------##-----Verification Logic --------#
+class PolyglotVerifier:
+    """Checks that a built file still opens as its primary type and that every payload entry passes its CRC."""
+    PARALLEL_MIN_ENTRY = 8 * 1024 * 1024  # entries at least this large are CRC-checked on worker threads
+    CHUNK = 1024 * 1024
+    MP4_CONTAINERS = {b"moov", b"trak", b"mdia", b"minf", b"stbl", b"udta", b"edts", b"dinf", b"mvex", b"moof",
+                      b"traf", b"mfra"}
+
+    @staticmethod
+    def verify(path: Path, primary_type: Optional[str] = None, workers: Optional[int] = None) -> dict:
+        started = time.perf_counter()
+        ptype = primary_type or detect_type(path)
+        report = {"path": str(path), "size": 0, "primary_type": ptype, "primary": None, "payload": None, "ok": False}
+        try:
+            report["size"] = path.stat().st_size
+            report["payload"] = PolyglotVerifier._verify_zip(path, workers)
+            primary_end = report["payload"]["offset"] if report["payload"]["present"] else report["size"]
+            report["primary"] = PolyglotVerifier._verify_primary(path, ptype, primary_end)
+            report["ok"] = report["primary"]["ok"] and report["payload"]["ok"]
+        except (IOError, OSError, ValueError) as e:
+            report["error"] = str(e)
+        report["elapsed"] = round(time.perf_counter() - started, 4)
+        return report
+
+    # ---- primary format sanity ----
+    @staticmethod
+    def _verify_primary(path: Path, ptype: str, end: int) -> dict:
+        result = {"ok": True, "end": end, "issues": [], "warnings": []}
+        if ptype == "ZIP":
+            if end != 0: result["warnings"].append(f"{end} bytes precede the ZIP data")
+            return result
+        checker = getattr(PolyglotVerifier, f"_check_{ptype.lower()}", None)
+        if checker is None:
+            result["warnings"].append(f"No structural check for type {ptype}")
+            return result
+        if end == 0:
+            result["ok"] = False; result["issues"].append("Primary section is empty")
+            return result
+        with path.open("rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            view = memoryview(mm)
+            try:
+                checker(view[:end], result)
+            except (IndexError, struct.error) as e:
+                result["issues"].append(f"Truncated structure: {e}")
+            finally:
+                view.release()
+        result["ok"] = not result["issues"]
+        return result
+
+    @staticmethod
+    def _check_png(buf: memoryview, result: dict):
+        if bytes(buf[:8]) != b"\x89PNG\r\n\x1a\n": result["issues"].append("Missing PNG signature"); return
+        pos, n = 8, len(buf)
+        while pos + 12 <= n:
+            length, = struct.unpack_from(">I", buf, pos)
+            ctype = bytes(buf[pos + 4:pos + 8])
+            if pos + 12 + length > n:
+                result["issues"].append(f"Chunk {ctype!r} at {pos} overruns the primary section"); return
+            crc, = struct.unpack_from(">I", buf, pos + 8 + length)
+            if zlib.crc32(buf[pos + 4:pos + 8 + length]) != crc:
+                result["issues"].append(f"CRC mismatch in chunk {ctype.decode('latin-1')} at offset {pos}")
+            pos += 12 + length
+            if ctype == b"IEND": break
+        else:
+            result["issues"].append("IEND chunk not found"); return
+        if pos != n: result["warnings"].append(f"{n - pos} bytes after IEND")
+
+    @staticmethod
+    def _check_jpeg(buf: memoryview, result: dict):
+        if bytes(buf[:2]) != b"\xff\xd8": result["issues"].append("Missing JPEG SOI marker"); return
+        data, pos, n = bytes(buf), 2, len(buf)
+        while pos + 2 <= n:
+            if data[pos] != 0xFF: result["issues"].append(f"Expected marker at offset {pos}"); return
+            marker = data[pos + 1]
+            if marker == 0xFF: pos += 1; continue  # fill byte
+            if marker == 0xD9:
+                pos += 2
+                if pos != n: result["warnings"].append(f"{n - pos} bytes after EOI")
+                return
+            if marker == 0x01 or 0xD0 <= marker <= 0xD7: pos += 2; continue
+            seg_len, = struct.unpack_from(">H", data, pos + 2)
+            pos += 2 + seg_len
+            if marker == 0xDA:  # entropy-coded scan: skip to the next real marker
+                while True:
+                    pos = data.find(b"\xff", pos)
+                    if pos < 0 or pos + 1 >= n: result["issues"].append("Scan data runs past the primary section"); return
+                    nxt = data[pos + 1]
+                    if nxt == 0x00 or 0xD0 <= nxt <= 0xD7 or nxt == 0xFF: pos += 1 if nxt == 0xFF else 2; continue
+                    break
+        result["issues"].append("EOI marker not found")
+
+    @staticmethod
+    def _check_pdf(buf: memoryview, result: dict):
+        head, tail = bytes(buf[:1024]), bytes(buf[-1024:])
+        if b"%PDF-" not in head: result["issues"].append("Missing %PDF- header"); return
+        eof = tail.rfind(b"%%EOF")
+        if eof < 0: result["issues"].append("Missing %%EOF marker"); return
+        if tail[eof + 5:].strip(): result["warnings"].append(f"{len(tail) - eof - 5} bytes after %%EOF")
+        sx = tail.rfind(b"startxref")
+        if sx < 0: result["issues"].append("Missing startxref"); return
+        try:
+            xref_off = int(tail[sx + 9:eof].strip())
+        except ValueError:
+            result["issues"].append("Unreadable startxref offset"); return
+        if xref_off >= len(buf): result["issues"].append(f"startxref {xref_off} is outside the primary section"); return
+        at = bytes(buf[xref_off:xref_off + 64]).lstrip()
+        if not (at.startswith(b"xref") or re.match(rb"\d+\s+\d+\s+obj", at)):
+            result["issues"].append(f"startxref {xref_off} does not point at an xref table or stream")
+
+    @staticmethod
+    def _check_mp4(buf: memoryview, result: dict):
+        top = PolyglotVerifier._walk_boxes(buf, 0, len(buf), result, 0)
+        if top and top[0] != b"ftyp": result["warnings"].append("First box is not ftyp")
+        if b"moov" not in top: result["issues"].append("moov box not found")
+
+    @staticmethod
+    def _walk_boxes(buf: memoryview, start: int, end: int, result: dict, depth: int) -> List[bytes]:
+        types, pos = [], start
+        while pos + 8 <= end:
+            size, btype = struct.unpack_from(">I4s", buf, pos)
+            header = 8
+            if size == 1: size, = struct.unpack_from(">Q", buf, pos + 8); header = 16
+            elif size == 0: size = end - pos
+            if size < header or pos + size > end or not all(32 <= c < 127 for c in btype):
+                result["issues"].append(f"Malformed box {btype!r} at offset {pos}"); return types
+            types.append(btype)
+            if btype in PolyglotVerifier.MP4_CONTAINERS and depth < 8:
+                PolyglotVerifier._walk_boxes(buf, pos + header, pos + size, result, depth + 1)
+            pos += size
+        if pos != end: result["issues"].append(f"{end - pos} stray bytes in box tree at depth {depth}")
+        return types
+
+    @staticmethod
+    def _check_gif(buf: memoryview, result: dict):
+        if bytes(buf[:6]) not in (b"GIF87a", b"GIF89a"): result["issues"].append("Missing GIF header"); return
+        if buf[-1] != 0x3B: result["issues"].append("GIF trailer (0x3B) is not the last primary byte")
+
+    @staticmethod
+    def _check_mp3(buf: memoryview, result: dict):
+        pos = 0
+        if bytes(buf[:3]) == b"ID3":
+            b = buf[6:10]
+            pos = 10 + ((b[0] & 0x7F) << 21 | (b[1] & 0x7F) << 14 | (b[2] & 0x7F) << 7 | (b[3] & 0x7F))
+        if pos + 2 > len(buf) or buf[pos] != 0xFF or (buf[pos + 1] & 0xE0) != 0xE0:
+            result["issues"].append(f"No MPEG frame sync at offset {pos}")
+
+    @staticmethod
+    def _check_txt(buf: memoryview, result: dict):
+        data = bytes(buf)
+        if b"\x00" in data: result["issues"].append("Text section contains NUL bytes")
+        try:
+            data.decode("utf-8")
+        except UnicodeDecodeError as e:
+            result["warnings"].append(f"Not valid UTF-8 at offset {e.start}")
+
+    _check_script = _check_txt
+
+    # ---- ZIP payload ----
+    @staticmethod
+    def _verify_zip(path: Path, workers: Optional[int]) -> dict:
+        result = {"present": False, "ok": True, "offset": 0, "entries": 0, "bytes": 0, "crc_failures": []}
+        try:
+            zf = zipfile.ZipFile(path, "r")
+        except zipfile.BadZipFile:
+            return result
+        with zf:
+            infos = [i for i in zf.infolist() if not i.is_dir()]
+            result.update(present=True, entries=len(infos), bytes=sum(i.file_size for i in infos),
+                          offset=min([i.header_offset for i in zf.infolist()] + [zf.start_dir]))
+            large = [i for i in infos if i.file_size >= PolyglotVerifier.PARALLEL_MIN_ENTRY]
+            small = [i for i in infos if i.file_size < PolyglotVerifier.PARALLEL_MIN_ENTRY]
+            with ThreadPoolExecutor(max_workers=workers or min(8, os.cpu_count() or 2)) as pool:
+                futures = [pool.submit(PolyglotVerifier._check_entry, path, info) for info in large]
+                failures = [err for err in (PolyglotVerifier._check_entry(path, info, zf) for info in small) if err]
+                failures += [err for err in (fut.result() for fut in futures) if err]
+        result["crc_failures"] = failures
+        result["ok"] = not failures
+        return result
+
+    @staticmethod
+    def _check_entry(path: Path, info: zipfile.ZipInfo, zf: Optional[zipfile.ZipFile] = None) -> Optional[dict]:
+        """Reads one entry to the end; zipfile raises BadZipFile when the CRC does not match."""
+        own = zf is None
+        try:
+            if own: zf = zipfile.ZipFile(path, "r")
+            with zf.open(info) as f:
+                while f.read(PolyglotVerifier.CHUNK): pass
+            return None
+        except (zipfile.BadZipFile, zlib.error, NotImplementedError, RuntimeError, OSError) as e:
+            return {"name": info.filename, "error": str(e)}
+        finally:
+            if own and zf is not None: zf.close()
+
+    @staticmethod
+    def summarize(report: dict) -> str:
+        if "error" in report: return f"{Path(report['path']).name}: FAILED ({report['error']})"
+        lines = [f"{Path(report['path']).name}: {'OK' if report['ok'] else 'FAILED'}"]
+        prim, pay = report["primary"], report["payload"]
+        lines.append(f"Primary ({report['primary_type']}, {human_size(prim['end'])}): {'OK' if prim['ok'] else 'FAILED'}")
+        lines += [f"  - {msg}" for msg in prim["issues"] + prim["warnings"]]
+        if pay["present"]:
+            lines.append(f"Payload: {pay['entries']} entries, {human_size(pay['bytes'])}, "
+                         f"{len(pay['crc_failures'])} CRC failure(s)")
+            lines += [f"  - {f['name']}: {f['error']}" for f in pay["crc_failures"][:20]]
+        else:
+            lines.append("Payload: no ZIP data found")
+        return "\n".join(lines)
+
+
+# --------------------------------##-----PDF Inspection --------#
+class PdfInspector:
+    """Page count and Info metadata read from the trailer and xref table with a handful of seeks.
+
+    Only classic (uncompressed) xref tables are parsed directly; xref streams, encrypted files and
+    anything unexpected fall back to PyPDF2. Results are cached per file identity.
+    """
+    TAIL_BYTES = 4096
+    MAX_OBJECT_BYTES = 4 * 1024 * 1024
+    _EOL = rb"[ \t]*(?:\r\n|\r|\n)"
+
+    @staticmethod
+    def inspect(p: Path) -> dict:
+        st = p.stat()
+        return dict(PdfInspector._inspect_cached(str(p.resolve()), st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns))
+
+    @staticmethod
+    def index_directory(directory: Path, recursive: bool = False, workers: Optional[int] = None) -> List[dict]:
+        """Inspects every PDF under ``directory`` across a process pool."""
+        pattern = "**/*" if recursive else "*"
+        paths = sorted(str(p) for p in directory.glob(pattern) if p.is_file() and detect_type(p) == "PDF")
+        if len(paths) < 2: return [_inspect_pdf_worker(p) for p in paths]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(_inspect_pdf_worker, paths, chunksize=8))
+
+    @staticmethod
+    @functools.lru_cache(maxsize=512)
+    def _inspect_cached(path_str: str, dev: int, ino: int, size: int, mtime_ns: int) -> dict:
+        result = {"path": path_str, "size": size, "pages": None, "title": None, "author": None}
+        try:
+            with open(path_str, "rb") as f:
+                result.update(PdfInspector._read_fast(f, size), method="xref")
+            return result
+        except (ValueError, IndexError, OSError):
+            pass
+        if not PDF_OK:
+            result["error"] = "Unsupported PDF structure and PyPDF2 is not installed"
+            return result
+        try:
+            with open(path_str, "rb") as f:
+                reader = PyPDF2.PdfReader(f)
+                meta = reader.metadata or {}
+                result.update(pages=int(reader.trailer["/Root"]["/Pages"]["/Count"]), method="PyPDF2",
+                              title=meta.get("/Title"), author=meta.get("/Author"))
+        except Exception as e:
+            result["error"] = str(e)
+        return result
+
+    @staticmethod
+    def _read_fast(f, size: int) -> dict:
+        f.seek(max(0, size - PdfInspector.TAIL_BYTES))
+        found = list(re.finditer(rb"startxref\s+(\d+)", f.read()))
+        if not found: raise ValueError("startxref not found")
+        sections, trailer, offset, seen = [], None, int(found[-1].group(1)), set()
+        while offset is not None and offset not in seen:  # newest section first, then follow /Prev
+            seen.add(offset)
+            text = PdfInspector._xref_section(f, offset, sections)
+            if trailer is None: trailer = text
+            prev = re.search(rb"/Prev\s+(\d+)", text)
+            offset = int(prev.group(1)) if prev else None
+        if b"/Encrypt" in trailer: raise ValueError("encrypted")
+        root = PdfInspector._ref(trailer, b"Root")
+        if root is None: raise ValueError("trailer has no /Root")
+        pages_ref = PdfInspector._ref(PdfInspector._object(f, sections, root), b"Pages")
+        if pages_ref is None: raise ValueError("catalog has no indirect /Pages")
+        count = re.search(rb"/Count\s+(\d+)", PdfInspector._object(f, sections, pages_ref))
+        if count is None: raise ValueError("page tree has no /Count")
+        result = {"pages": int(count.group(1)), "title": None, "author": None}
+        info_ref = PdfInspector._ref(trailer, b"Info")
+        if info_ref is not None:
+            info = PdfInspector._object(f, sections, info_ref)
+            for key in ("Title", "Author"):
+                result[key.lower()] = PdfInspector._string_value(f, sections, info, key.encode())
+        return result
+
+    @staticmethod
+    def _xref_section(f, offset: int, sections: list) -> bytes:
+        """Records (first, count, entries offset) per subsection and returns the trailer dictionary text."""
+        f.seek(offset)
+        head = re.match(rb"\s*xref\s*", f.read(64))
+        if head is None: raise ValueError("not a classic xref table")
+        pos = offset + head.end()
+        while True:
+            f.seek(pos)
+            chunk = f.read(64)
+            sub = re.match(rb"(\d+)[ \t]+(\d+)" + PdfInspector._EOL, chunk)
+            if sub is None: break
+            first, count = int(sub.group(1)), int(sub.group(2))
+            sections.append((first, count, pos + sub.end()))
+            pos += sub.end() + 20 * count
+        if not chunk.lstrip().startswith(b"trailer"): raise ValueError("trailer not found")
+        f.seek(pos)
+        return f.read(PdfInspector.TAIL_BYTES).split(b"startxref", 1)[0]
+
+    @staticmethod
+    def _ref(text: bytes, key: bytes) -> Optional[int]:
+        m = re.search(rb"/" + key + rb"\s+(\d+)\s+\d+\s+R", text)
+        return int(m.group(1)) if m else None
+
+    @staticmethod
+    def _object(f, sections: list, num: int) -> bytes:
+        for first, count, entries in sections:
+            if first <= num < first + count:
+                f.seek(entries + 20 * (num - first))
+                entry = f.read(20)
+                if entry[17:18] != b"n": raise ValueError(f"object {num} is not in use")
+                f.seek(int(entry[:10]))
+                body = b""
+                while b"endobj" not in body and len(body) < PdfInspector.MAX_OBJECT_BYTES:
+                    block = f.read(64 * 1024)
+                    if not block: break
+                    body += block
+                if not re.match(rb"\s*" + str(num).encode() + rb"\s+\d+\s+obj", body):
+                    raise ValueError(f"xref offset for object {num} is wrong")
+                return body.split(b"endobj", 1)[0]
+        raise ValueError(f"object {num} not in xref table")
+
+    @staticmethod
+    def _string_value(f, sections: list, text: bytes, key: bytes) -> Optional[str]:
+        m = re.search(rb"/" + key + rb"\s*([(<]|\d+\s+\d+\s+R)", text)
+        if m is None: return None
+        if m.group(1)[-1:] == b"R":
+            body = PdfInspector._object(f, sections, int(m.group(1).split()[0]))
+            inner = re.search(rb"obj\s*([(<])", body)
+            if inner is None: return None
+            return PdfInspector._decode_string(body, inner.start(1))
+        return PdfInspector._decode_string(text, m.start(1))
+
+    @staticmethod
+    def _decode_string(text: bytes, start: int) -> str:
+        if text[start:start + 1] == b"<":
+            raw = bytes.fromhex(re.sub(rb"\s", b"", text[start + 1:text.index(b">", start)]).decode("ascii").ljust(2, "0"))
+        else:
+            out, depth, i = bytearray(), 0, start + 1
+            escapes = {ord("n"): 10, ord("r"): 13, ord("t"): 9, ord("b"): 8, ord("f"): 12}
+            while i < len(text):
+                c = text[i]
+                if c == 0x5C:  # backslash
+                    i += 1; c = text[i]
+                    if c in escapes: out.append(escapes[c])
+                    elif 0x30 <= c <= 0x37:
+                        digits = re.match(rb"[0-7]{1,3}", text[i:i + 3]).group(0)
+                        out.append(int(digits, 8) & 0xFF); i += len(digits) - 1
+                    elif c not in (10, 13): out.append(c)
+                elif c == 0x28: depth += 1; out.append(c)
+                elif c == 0x29:
+                    if depth == 0: break
+                    depth -= 1; out.append(c)
+                else: out.append(c)
+                i += 1
+            raw = bytes(out)
+        if raw[:2] == b"\xfe\xff": return raw[2:].decode("utf-16-be", errors="replace")
+        return raw.decode("latin-1")
+
+
+def _inspect_pdf_worker(path_str: str) -> dict:
+    """Process-pool entry point (must be a picklable top-level function)."""
+    try:
+        return PdfInspector.inspect(Path(path_str))
+    except Exception as e:  # one unreadable file must not abort the whole batch
+        return {"path": path_str, "error": str(e)}
+
+
+# --------------------------------##-----Build Definitions & Watch Mode --------#
+class BuildDefinition:
+    """A saved build as JSON: combination label, primary, secondaries per type, output, stub, reproducible flag."""
+
+    @staticmethod
+    def load(path: Path) -> dict:
+        return BuildDefinition.from_dict(json.loads(path.read_text(encoding="utf-8")), path.resolve().parent)
+
+    @staticmethod
+    def from_dict(defn: dict, base: Path) -> dict:
+        """Validates a definition and makes its paths absolute (relative ones are taken from ``base``)."""
+        if not isinstance(defn, dict): raise ValueError("definition must be a JSON object")
+        if not isinstance(defn.get("output"), str): raise ValueError("'output' must be a string")
+        if not isinstance(defn.get("primary"), (str, type(None))): raise ValueError("'primary' must be a string or null")
+        secondaries = defn.get("secondaries", {})
+        if not isinstance(secondaries, dict) or not all(
+                isinstance(t, str) and isinstance(paths, list) and all(isinstance(q, str) for q in paths)
+                for t, paths in secondaries.items()):
+            raise ValueError("'secondaries' must map each type to a list of path strings")
+        defn = dict(defn)
+        absolute = lambda p: os.path.abspath(os.path.join(base, os.path.expanduser(p)))
+        if defn.get("primary"): defn["primary"] = absolute(defn["primary"])
+        defn["output"] = absolute(defn["output"])
+        defn["secondaries"] = {t: [absolute(p) for p in paths] for t, paths in secondaries.items()}
+        BuildDefinition.combination(defn)
+        return defn
+
+    @staticmethod
+    def save(defn: dict, path: Path):
+        path.write_text(json.dumps(defn, indent=2), encoding="utf-8")
+
+    @staticmethod
+    def combination(defn: dict) -> dict:
+        for combo in AppConfig.COMBINATIONS:
+            if combo["label"] == defn.get("combination"): return combo
+        raise ValueError(f"Unknown combination: {defn.get('combination')!r}")
+
+    @staticmethod
+    def inputs(defn: dict) -> List[str]:
+        return ([defn["primary"]] if defn.get("primary") else []) + [p for ps in defn["secondaries"].values() for p in ps]
+
+    @staticmethod
+    def stub_text(defn: dict) -> str:
+        if "stub" in defn: return defn["stub"]
+        return AppConfig.SCRIPT_TEMPLATES.get(defn.get("stub_template", ""), "")
+
+    @staticmethod
+    def resolve(defn: dict) -> Tuple[dict, Optional[Path], SelectionStore, str]:
+        """Returns (combination, primary path, secondaries store, stub text) for a loaded definition."""
+        combo = BuildDefinition.combination(defn)
+        primary = Path(defn["primary"]) if defn.get("primary") else None
+        if combo["primary"] != "ZIP" and primary is None: raise ValueError("A primary file must be chosen.")
+        store = SelectionStore()
+        primary_id = SelectionStore.identity(primary) if primary else None
+        for type_name, paths in defn["secondaries"].items(): store.add(paths, type_name, exclude=primary_id)
+        stub = BuildDefinition.stub_text(defn) if combo["strategy"] == "Script+ZIP" else ""
+        return combo, primary, store, stub
+
+    @staticmethod
+    def run(defn: dict, changed: Optional[Set[str]] = None) -> dict:
+        """Builds a definition; ``changed`` enables splicing unchanged entries from the existing output."""
+        combo, primary, store, stub = BuildDefinition.resolve(defn)
+        return FileCombiner.build(combo["strategy"], primary, store.pairs(), Path(defn["output"]), stub,
+                                  bool(defn.get("reproducible")), changed)
+
+    @staticmethod
+    def plan(defn: dict) -> dict:
+        combo, primary, store, stub = BuildDefinition.resolve(defn)
+        return BuildPlanner.plan(combo["strategy"], primary, list(store.records()), stub,
+                                 bool(defn.get("reproducible")), Path(defn["output"]).suffix.lower() == ".py")
+
+
+class _InotifySource:
+    """Linux inotify on the parent directories of the watched files (so editor rename-saves are seen)."""
+    MASK = 0x2 | 0x4 | 0x8 | 0x40 | 0x80 | 0x100 | 0x200  # MODIFY ATTRIB CLOSE_WRITE MOVED_FROM/TO CREATE DELETE
+    EVENT = struct.Struct("iIII")
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"): raise OSError("inotify is only available on Linux")
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0: raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs: Dict[int, str] = {}
+        self.watched: Set[str] = set()
+
+    def update(self, paths: Iterable[str]):
+        self.watched = set(paths)
+        known = set(self.dirs.values())
+        for d in {os.path.dirname(p) for p in self.watched} - known:
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(d), self.MASK)
+            if wd >= 0: self.dirs[wd] = d
+
+    def wait(self, timeout: float) -> Set[str]:
+        if not select.select([self.fd], [], [], timeout)[0]: return set()
+        data, pos, changed = os.read(self.fd, 64 * 1024), 0, set()
+        while pos + self.EVENT.size <= len(data):
+            wd, _mask, _cookie, name_len = self.EVENT.unpack_from(data, pos)
+            name = data[pos + self.EVENT.size:pos + self.EVENT.size + name_len].rstrip(b"\0")
+            pos += self.EVENT.size + name_len
+            path = os.path.join(self.dirs.get(wd, ""), os.fsdecode(name))
+            if path in self.watched: changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _PollingSource:
+    """Portable fallback: compares (mtime, size) snapshots every ``interval`` seconds."""
+
+    def __init__(self, interval: float = 1.0):
+        self.interval = interval
+        self.snapshot: Dict[str, Optional[Tuple[int, int]]] = {}
+
+    @staticmethod
+    def _stamp(path: str) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def update(self, paths: Iterable[str]):
+        self.snapshot = {p: self.snapshot[p] if p in self.snapshot else self._stamp(p) for p in paths}
+
+    def wait(self, timeout: float) -> Set[str]:
+        time.sleep(min(self.interval, timeout))
+        changed = set()
+        for path, old in self.snapshot.items():
+            new = self._stamp(path)
+            if new != old: self.snapshot[path] = new; changed.add(path)
+        return changed
+
+    def close(self):
+        pass
+
+
+class BuildWatcher:
+    """Rebuilds saved build definitions when their inputs (or the definition files) change."""
+
+    def __init__(self, definition_paths: List[Path], debounce: float = 0.5, poll: bool = False,
+                 interval: float = 1.0, log: Callable[[dict], None] = lambda e: print(json.dumps(e), flush=True)):
+        self.debounce = debounce
+        self.log = log
+        self.stop_event = threading.Event()
+        self.definitions: Dict[str, Optional[dict]] = {os.path.abspath(p): None for p in definition_paths}
+        self.source = None
+        if not poll:
+            try:
+                self.source = _InotifySource()
+            except (OSError, AttributeError):
+                pass
+        if self.source is None: self.source = _PollingSource(interval)
+
+    def run(self):
+        try:
+            for def_path in self.definitions: self._rebuild(def_path, None)
+            while not self.stop_event.is_set():
+                changed = self.source.wait(1.0)
+                if not changed: continue
+                deadline = time.monotonic() + self.debounce  # let a burst of saves settle
+                while time.monotonic() < deadline and not self.stop_event.is_set():
+                    more = self.source.wait(max(0.0, deadline - time.monotonic()))
+                    if more: changed |= more; deadline = time.monotonic() + self.debounce
+                for def_path, defn in list(self.definitions.items()):
+                    if def_path in changed or defn is None:
+                        self._rebuild(def_path, None)
+                    elif changed & set(BuildDefinition.inputs(defn)):
+                        self._rebuild(def_path, changed)
+        finally:
+            self.source.close()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _rebuild(self, def_path: str, changed: Optional[Set[str]]):
+        started = time.perf_counter()
+        event = {"definition": def_path, "changed": sorted(changed) if changed else []}
+        try:
+            if changed is None: self.definitions[def_path] = BuildDefinition.load(Path(def_path))
+            event.update(BuildDefinition.run(self.definitions[def_path], changed))
+        except (IOError, OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+            event["error"] = str(e)
+        except Exception as e:  # one broken definition must not stop the watcher for the others
+            event["error"] = f"{type(e).__name__}: {e}"
+        event["elapsed"] = round(time.perf_counter() - started, 4)
+        self.log(event)
+        watched = set(self.definitions)
+        for defn in self.definitions.values():
+            if defn: watched.update(BuildDefinition.inputs(defn))
+        self.source.update(watched)
+
+
+# --------------------------------##-----Build Planning --------#
+class BuildPlanner:
+    """Predicts payload size, output size and build time from sampled compression and a machine calibration."""
+    BLOCK = 64 * 1024
+    BLOCKS_PER_ENTRY = 4
+    MAX_SAMPLED_PER_TYPE = 32  # the remaining entries of a type use that type's measured ratio
+    CALIBRATION_BYTES = 4 * 1024 * 1024
+    _calibration: Optional[dict] = None
+    _lock = threading.Lock()
+
+    @staticmethod
+    def calibration(recalibrate: bool = False) -> dict:
+        """Loads the saved calibration for this machine, measuring (about a second) when missing."""
+        with BuildPlanner._lock:
+            machine = {"node": platform.node(), "cpus": os.cpu_count(), "python": platform.python_version()}
+            if not recalibrate and BuildPlanner._calibration is None and AppConfig.CALIBRATION_PATH.exists():
+                try:
+                    saved = json.loads(AppConfig.CALIBRATION_PATH.read_text(encoding="utf-8"))
+                    if saved.get("machine") == machine: BuildPlanner._calibration = saved
+                except (json.JSONDecodeError, IOError):
+                    pass
+            if recalibrate or BuildPlanner._calibration is None:
+                BuildPlanner._calibration = dict(BuildPlanner._measure(), machine=machine)
+                try:
+                    AppConfig.CALIBRATION_PATH.write_text(json.dumps(BuildPlanner._calibration, indent=2),
+                                                          encoding="utf-8")
+                except IOError:
+                    pass
+            return BuildPlanner._calibration
+
+    @staticmethod
+    def _measure() -> dict:
+        n = BuildPlanner.CALIBRATION_BYTES
+        rng = random.Random(0)
+        words = [bytes(rng.choice(b"abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 9))) for _ in range(2000)]
+        text = b" ".join(rng.choice(words) for _ in range(n // 5))[:n]
+        noise = os.urandom(n)
+        result = {"deflate": {}}
+        for level in (6, AppConfig.REPRO_COMPRESSLEVEL):
+            rates = {}
+            for label, data in (("text", text), ("random", noise)):
+                started = time.perf_counter()
+                packed = zlib.compress(data, level)
+                rates[label] = n / max(time.perf_counter() - started, 1e-6)
+                if label == "text": rates["text_ratio"] = len(packed) / n
+            result["deflate"][str(level)] = rates
+        started = time.perf_counter()
+        hashlib.sha256(noise).digest()
+        result["sha256"] = n / max(time.perf_counter() - started, 1e-6)
+        with tempfile.TemporaryFile() as tmp:
+            started = time.perf_counter()
+            for _ in range(4): tmp.write(noise)
+            tmp.flush(); os.fsync(tmp.fileno())
+            result["write"] = 4 * n / max(time.perf_counter() - started, 1e-6)
+        return result
+
+    @staticmethod
+    def _sample_ratio(path: str, size: int, level: int) -> Optional[float]:
+        """Deflates a few evenly spaced blocks of the file and returns compressed/raw."""
+        blocks = max(1, min(BuildPlanner.BLOCKS_PER_ENTRY, size // BuildPlanner.BLOCK))
+        step = max(0, size - BuildPlanner.BLOCK) // max(1, blocks - 1) if blocks > 1 else 0
+        raw = packed = 0
+        try:
+            with open(path, "rb") as f:
+                for i in range(blocks):
+                    f.seek(i * step)
+                    data = f.read(BuildPlanner.BLOCK)
+                    comp = zlib.compressobj(level, zlib.DEFLATED, -15)
+                    raw += len(data); packed += len(comp.compress(data)) + len(comp.flush())
+        except OSError:
+            return None
+        return packed / raw if raw else None
+
+    @staticmethod
+    def plan(strategy: str, primary_path: Optional[Path], records: List[Tuple[str, int, float, str]],
+             stub_text: str = "", reproducible: bool = False, python_main: bool = False) -> dict:
+        """``records`` are SelectionStore.records() tuples: (path, size, mtime, type)."""
+        started = time.perf_counter()
+        cal = BuildPlanner.calibration()
+        level = AppConfig.REPRO_COMPRESSLEVEL if reproducible else 6
+        rates = cal["deflate"][str(level)]
+        by_type: Dict[str, List[Tuple[str, int, float, str]]] = {}
+        for rec in records: by_type.setdefault(rec[3], []).append(rec)
+        payload, compress_s, types = 22, 0.0, {}  # 22: end of central directory record
+        for type_name, recs in by_type.items():
+            picks = recs if len(recs) <= BuildPlanner.MAX_SAMPLED_PER_TYPE else \
+                [recs[i * len(recs) // BuildPlanner.MAX_SAMPLED_PER_TYPE] for i in range(BuildPlanner.MAX_SAMPLED_PER_TYPE)]
+            sampled = [(r[1], BuildPlanner._sample_ratio(r[0], r[1], level)) for r in picks if r[1]]
+            sampled = [(size, ratio) for size, ratio in sampled if ratio is not None]
+            weight = sum(size for size, _ in sampled)
+            ratio = sum(size * r for size, r in sampled) / weight if weight else 1.0
+            total = sum(r[1] for r in recs)
+            names = sum(len(os.path.basename(r[0]).encode("utf-8")) for r in recs)
+            payload += int(total * ratio) + len(recs) * (30 + 46) + 2 * names  # local + central headers
+            # deflate speed falls from the text rate towards the random-data rate as data gets less compressible
+            mix = min(1.0, max(0.0, (ratio - rates["text_ratio"]) / max(1e-6, 1.0 - rates["text_ratio"])))
+            compress_s += total / (rates["text"] + (rates["random"] - rates["text"]) * mix)
+            types[type_name] = {"files": len(recs), "bytes": total, "ratio": round(ratio, 4), "sampled": len(sampled)}
+        if strategy == "ZIP-last":
+            head = primary_path.stat().st_size if primary_path else 0
+        else:
+            head = len(FileCombiner._stub_bytes(stub_text))
+            if python_main: payload += len(zlib.compress(stub_text.encode("utf-8"), 6)) + 76 + 2 * len("__main__.py")
+        output = head + payload
+        write_s = output / cal["write"] + (head / cal["write"] if strategy == "ZIP-last" else 0)
+        hash_s = output / cal["sha256"] + (output / cal["sha256"] if reproducible else 0)
+        return {"entries": len(records), "input_bytes": sum(r[1] for r in records), "compress_level": level,
+                "predicted_payload_bytes": payload, "predicted_output_bytes": output,
+                "predicted_seconds": round(compress_s + write_s + hash_s, 3),
+                "breakdown_seconds": {"compress": round(compress_s, 3), "write": round(write_s, 3),
+                                      "hash": round(hash_s, 3)},
+                "by_type": types, "planning_seconds": round(time.perf_counter() - started, 3)}
+
+
+# --------------------------------##-----Local Build Service --------#
+class BuildService:
+    """Priority job queue plus a bounded worker pool for build, inspect and extract jobs.
+
+    Lower ``priority`` values run first; jobs of equal priority run in submission order. Build outputs
+    and extraction folders must lie inside ``allowed_dirs`` (default: the current directory).
+    """
+    KINDS = ("build", "inspect", "extract")
+    KEEP_FINISHED = 1000
+    THROUGHPUT_WINDOW = 60.0
+
+    def __init__(self, workers: int = 4, max_queue: int = 256, allowed_dirs: Optional[List[Path]] = None):
+        self.allowed_dirs = [os.path.realpath(d) for d in (allowed_dirs or [Path.cwd()])]
+        self.jobs_q: "queue.PriorityQueue" = queue.PriorityQueue(maxsize=max_queue)
+        self.jobs: "collections.OrderedDict[str, dict]" = collections.OrderedDict()
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.counts = {"submitted": 0, "completed": 0, "failed": 0}
+        self.running = 0
+        self.latencies = collections.deque(maxlen=2000)
+        self.finish_times = collections.deque()
+        self.started = time.time()
+        self.workers = [threading.Thread(target=self._worker, name=f"build-worker-{i}", daemon=True)
+                        for i in range(max(1, workers))]
+        for t in self.workers: t.start()
+
+    def submit(self, request: dict) -> dict:
+        """Queues a job; raises ValueError for bad requests and queue.Full when the queue is at capacity."""
+        kind = request.get("kind")
+        if kind not in self.KINDS: raise ValueError(f"kind must be one of {', '.join(self.KINDS)}")
+        if kind == "build":
+            defn = request.get("definition")
+            if not isinstance(defn, dict): raise ValueError("build jobs need a 'definition' object")
+            defn = BuildDefinition.from_dict(defn, Path.cwd())
+            self._check_writable(defn["output"])
+            request = dict(request, definition=defn)
+        elif not request.get("path"):
+            raise ValueError(f"{kind} jobs need a 'path'")
+        elif kind == "extract":
+            p = Path(request["path"])
+            dest = os.path.abspath(request.get("dest") or p.with_name(p.name + "_extracted"))
+            self._check_writable(dest)
+            request = dict(request, dest=dest)
+        priority = int(request.get("priority", 0))
+        with self.lock:
+            self.seq += 1
+            job = {"id": f"{self.seq:08d}", "kind": kind, "priority": priority, "status": "queued",
+                   "submitted": time.time(), "request": request, "done": threading.Event()}
+            self.jobs_q.put_nowait((priority, self.seq, job["id"]))
+            self.jobs[job["id"]] = job
+            self.counts["submitted"] += 1
+            self._prune()
+        return self.describe(job["id"])
+
+    def _check_writable(self, path: str):
+        """Raises PermissionError unless ``path`` resolves inside one of the allowed directories."""
+        real = os.path.realpath(path)
+        for root in self.allowed_dirs:
+            try:
+                if os.path.commonpath([real, root]) == root: return
+            except ValueError:  # different drives on Windows
+                continue
+        raise PermissionError(f"{path} is outside the allowed directories")
+
+    def describe(self, job_id: str, wait: float = 0.0) -> Optional[dict]:
+        job = self.jobs.get(job_id)
+        if job is None: return None
+        if wait > 0: job["done"].wait(wait)
+        with self.lock:
+            return {k: v for k, v in job.items() if k not in ("done", "request")}
+
+    def stats(self) -> dict:
+        with self.lock:
+            now = time.time()
+            while self.finish_times and self.finish_times[0] < now - self.THROUGHPUT_WINDOW:
+                self.finish_times.popleft()
+            ordered = sorted(self.latencies)
+            pct = lambda q: round(1000 * ordered[min(len(ordered) - 1, int(q * len(ordered)))], 2) if ordered else None
+            return dict(self.counts, queue_depth=self.jobs_q.qsize(), running=self.running, workers=len(self.workers),
+                        latency_ms={"p50": pct(0.50), "p90": pct(0.90), "p99": pct(0.99)},
+                        throughput_per_s=round(len(self.finish_times) / min(self.THROUGHPUT_WINDOW,
+                                                                            max(now - self.started, 1.0)), 3),
+                        uptime_s=round(now - self.started, 1))
+
+    def _prune(self):
+        finished = [jid for jid, j in self.jobs.items() if j["status"] in ("done", "failed")]
+        for jid in finished[:max(0, len(finished) - self.KEEP_FINISHED)]: del self.jobs[jid]
+
+    def _worker(self):
+        while True:
+            _priority, _seq, job_id = self.jobs_q.get()
+            job = self.jobs[job_id]
+            with self.lock:
+                self.running += 1
+                job.update(status="running", started=time.time())
+            try:
+                outcome = {"status": "done", "result": getattr(self, f"_run_{job['kind']}")(job["request"])}
+            except Exception as e:
+                outcome = {"status": "failed", "error": str(e)}
+            with self.lock:
+                self.running -= 1
+                job.update(outcome, finished=time.time())
+                self.counts["completed" if job["status"] == "done" else "failed"] += 1
+                self.latencies.append(job["finished"] - job["submitted"])
+                self.finish_times.append(job["finished"])
+            job["done"].set()
+            self.jobs_q.task_done()
+
+    def _run_build(self, request: dict) -> dict:
+        self._check_writable(request["definition"]["output"])
+        return BuildDefinition.run(request["definition"])
+
+    @staticmethod
+    def _run_inspect(request: dict) -> dict:
+        p = Path(request["path"])
+        st = p.stat()
+        result = {"path": str(p), "type": detect_type(p), "size": st.st_size,
+                  "entries": BuildService._zip_entries(str(p.resolve()), st.st_dev, st.st_ino, st.st_size,
+                                                      st.st_mtime_ns)}
+        if result["type"] == "PDF": result["pdf"] = PdfInspector.inspect(p)
+        if request.get("verify"): result["verify"] = PolyglotVerifier.verify(p, request.get("primary_type"))
+        return result
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _zip_entries(path_str: str, dev: int, ino: int, size: int, mtime_ns: int) -> Optional[list]:
+        try:
+            with zipfile.ZipFile(path_str, "r") as zf:
+                return [{"name": i.filename, "size": i.file_size, "packed": i.compress_size} for i in zf.infolist()]
+        except zipfile.BadZipFile:
+            return None
+
+    def _run_extract(self, request: dict) -> dict:
+        p, dest = Path(request["path"]), Path(request["dest"])
+        self._check_writable(str(dest))
+        members = request.get("members")
+        with zipfile.ZipFile(p, "r") as zf:
+            zf.extractall(dest, members=members)
+            count = len(members) if members else len(zf.infolist())
+        return {"dest": str(dest), "extracted": count}
+
+
+class _BuildServiceHandler(BaseHTTPRequestHandler):
+    """POST /jobs, GET /jobs/<id>[?wait=seconds], GET /stats.
+
+    Every request must carry the per-run token in the ``X-Polyglot-Token`` header, and POST bodies must
+    be ``application/json``; together these stop web pages in a local browser from driving the service.
+    """
+    service: BuildService = None
+    token: str = ""
+    MAX_BODY = 16 * 1024 * 1024
+    TOKEN_HEADER = "X-Polyglot-Token"
+
+    def _send(self, code: int, body: dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _authorized(self) -> bool:
+        if hmac.compare_digest(self.headers.get(self.TOKEN_HEADER, "").encode(), self.token.encode()): return True
+        self._send(401, {"error": f"missing or wrong {self.TOKEN_HEADER} header"})
+        return False
+
+    def do_POST(self):
+        if not self._authorized(): return
+        if self.path.rstrip("/") != "/jobs": self._send(404, {"error": "not found"}); return
+        if self.headers.get_content_type() != "application/json":
+            self._send(415, {"error": "Content-Type must be application/json"}); return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > self.MAX_BODY: self._send(413, {"error": "request too large"}); return
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not isinstance(request, dict): raise ValueError("request body must be a JSON object")
+            self._send(202, self.service.submit(request))
+        except PermissionError as e:
+            self._send(403, {"error": str(e)})
+        except (ValueError, TypeError, KeyError) as e:
+            self._send(400, {"error": str(e)})
+        except queue.Full:
+            self._send(503, {"error": "job queue is full"})
+        except Exception as e:  # never drop the connection without a response
+            self._send(500, {"error": f"{type(e).__name__}: {e}"})
+
+    def do_GET(self):
+        if not self._authorized(): return
+        url = urllib.parse.urlparse(self.path)
+        if url.path == "/stats": self._send(200, self.service.stats()); return
+        if url.path.startswith("/jobs/"):
+            params = urllib.parse.parse_qs(url.query)
+            try:
+                wait = min(float(params.get("wait", ["0"])[0]), 300.0)
+            except ValueError:
+                wait = 0.0
+            job = self.service.describe(url.path[len("/jobs/"):], wait)
+            if job is None: self._send(404, {"error": "unknown job"}); return
+            self._send(200, job); return
+        self._send(404, {"error": "not found"})
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def serve(port: int = 8765, workers: int = 4, max_queue: int = 256, allowed_dirs: Optional[List[Path]] = None):
+    """Runs the build service on 127.0.0.1 until interrupted.
+
+    A fresh access token is printed at startup and written (owner-only) to AppConfig.SERVICE_TOKEN_PATH.
+    """
+    service = BuildService(workers, max_queue, allowed_dirs)
+    token = secrets.token_urlsafe(32)
+    handler = type("Handler", (_BuildServiceHandler,), {"service": service, "token": token})
+    fd = os.open(AppConfig.SERVICE_TOKEN_PATH, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f: f.write(token)
+    try:
+        with ThreadingHTTPServer(("127.0.0.1", port), handler) as httpd:
+            print(json.dumps({"listening": f"http://127.0.0.1:{httpd.server_address[1]}", "workers": workers,
+                              "token": token, "token_file": str(AppConfig.SERVICE_TOKEN_PATH),
+                              "allowed_dirs": service.allowed_dirs}), flush=True)
+            httpd.serve_forever()
+    finally:
+        try:
+            AppConfig.SERVICE_TOKEN_PATH.unlink()
+        except OSError:
+            pass
+
 
 # --------------------------------##-----Preview Logic --------#
 class PreviewGenerator:
@@ -275,12 +1545,10 @@ class PreviewGenerator:
 
     @staticmethod
     def _pdf_info(p: Path) -> str:
-        if not PDF_OK: return "Install PyPDF2 for a basic PDF summary.\n"
-        with p.open("rb") as f:
-            reader = PyPDF2.PdfReader(f)
-            meta = reader.metadata or {}
-            return (
-                f"Pages: {len(reader.pages)}\nTitle: {meta.get('/Title', 'N/A')}\nAuthor: {meta.get('/Author', 'N/A')}\n")
+        info = PdfInspector.inspect(p)
+        if "error" in info:
+            return "Install PyPDF2 for a basic PDF summary.\n" if not PDF_OK else f"(PDF summary unavailable: {info['error']})"
+        return f"Pages: {info['pages']}\nTitle: {info['title'] or 'N/A'}\nAuthor: {info['author'] or 'N/A'}\n"
 
     @staticmethod
     def _zip_list(p: Path) -> str:
@@ -291,6 +1559,69 @@ class PreviewGenerator:
             return f"{len(names)} entries:\n{head}{more}\n"
 
 
+# --------------------------------##-----Thumbnail Logic --------#
+class ThumbnailCache:
+    """On-disk PNG thumbnails keyed by file identity (inode, size, mtime) plus head/tail bytes."""
+    SAMPLE = 64 * 1024
+
+    @staticmethod
+    def content_key(p: Path, size: int) -> str:
+        st = p.stat()
+        st_size = st.st_size
+        # size + mtime + inode tell apart same-size files that differ only in the middle
+        h = hashlib.blake2b(f"{st_size}:{st.st_mtime_ns}:{st.st_dev}:{st.st_ino}:{size}".encode(), digest_size=16)
+        with p.open("rb") as f:
+            h.update(f.read(ThumbnailCache.SAMPLE))
+            if st_size > 2 * ThumbnailCache.SAMPLE:
+                f.seek(-ThumbnailCache.SAMPLE, os.SEEK_END); h.update(f.read())
+        return h.hexdigest()
+
+    @staticmethod
+    def get_or_create(p: Path, size: int = AppConfig.THUMB_SIZE) -> Optional[Path]:
+        """Returns the cached thumbnail for ``p``, rendering it first if needed (safe to call from worker threads)."""
+        if not PIL_OK: return None
+        tmp = None
+        try:
+            dest = AppConfig.THUMB_CACHE_DIR / f"{ThumbnailCache.content_key(p, size)}.png"
+            if dest.exists():
+                os.utime(dest); return dest  # mtime doubles as last-used time for evict()
+            AppConfig.THUMB_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+            tmp = dest.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            with Image.open(p) as img:
+                img.draft("RGB", (size, size))  # JPEG: let the decoder downscale by 1/2..1/8
+                img.thumbnail((size, size), reducing_gap=2.0)
+                thumb = img if img.mode in ("RGB", "RGBA") else img.convert("RGBA")
+                thumb.save(tmp, "PNG")
+            os.replace(tmp, dest)
+            return dest
+        except Exception:
+            return None
+        finally:
+            if tmp is not None and tmp.exists(): tmp.unlink()
+
+    @staticmethod
+    def evict(max_files: int = AppConfig.THUMB_CACHE_MAX_FILES, max_bytes: int = AppConfig.THUMB_CACHE_MAX_BYTES) -> int:
+        """Deletes the least recently used thumbnails until the cache is within both caps; returns how many went."""
+        entries = []
+        try:
+            with os.scandir(AppConfig.THUMB_CACHE_DIR) as it:
+                for e in it:
+                    if e.name.endswith(".png") and e.is_file():
+                        st = e.stat(); entries.append((st.st_mtime, st.st_size, e.path))
+        except OSError:
+            return 0
+        entries.sort()
+        count, total, removed = len(entries), sum(size for _, size, _ in entries), 0
+        for _, size, path in entries:
+            if count <= max_files and total <= max_bytes: break
+            try:
+                os.unlink(path); removed += 1
+            except OSError:
+                pass
+            count -= 1; total -= size
+        return removed
+
+
 # --------------------------------##-----Main app --------#
 class PolyglotCombiner:
     """The main application class."""
@@ -306,7 +1637,7 @@ class PolyglotCombiner:
         self._refresh_all()
 
     def _load_config(self) -> dict:
-        defaults = {"theme": "light", "last_combo_index": 0, "window_size": "1220x740"}
+        defaults = {"theme": "light", "last_combo_index": 0, "window_size": "1220x740", "reproducible": False}
         if not AppConfig.CONFIG_PATH.exists(): return defaults
         try:
             config = json.loads(AppConfig.CONFIG_PATH.read_text(encoding="utf-8"))
@@ -319,6 +1650,7 @@ class PolyglotCombiner:
         try:
             self.cfg["last_combo_index"] = self.cmb_combo.current()
             self.cfg["window_size"] = self.root.winfo_geometry()
+            self.cfg["reproducible"] = self.reproducible.get()
             AppConfig.CONFIG_PATH.write_text(json.dumps(self.cfg, indent=2), encoding="utf-8")
         except (IOError, TypeError):
             pass
@@ -334,10 +1666,14 @@ class PolyglotCombiner:
 
     def _init_state(self):
         self.primary_path: Optional[Path] = None
-        self.secondary_paths: Dict[str, List[Path]] = {}
+        self.selection = SelectionStore()
         self.strategy = "ZIP-last"
         self.output_path = tk.StringVar(value="")
         self.stub_template = tk.StringVar(value="Batch (.bat)")
+        self.reproducible = tk.BooleanVar(value=bool(self.cfg["reproducible"]))
+        self.plan_generation = 0
+        self.plan_after_id: Optional[str] = None
+        self.plan_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="build-plan")
         self.preview_img: Optional[ImageTk.PhotoImage] = None
 
     def _init_style_and_theme(self):
@@ -354,6 +1690,7 @@ class PolyglotCombiner:
             Theme.apply_to_widget(self.canvas, self.cfg["theme"], "canvas")
             self.zip_inspector.apply_theme(self.cfg["theme"])
             self.quick_zip.apply_theme(self.cfg["theme"])
+            self.thumb_strip.apply_theme(self.cfg["theme"])
 
     def _build_ui(self):
         outer = ttk.Panedwindow(self.root, orient="horizontal")
@@ -376,6 +1713,9 @@ class PolyglotCombiner:
         settings_menu = tk.Menu(self.menubar, tearoff=0)
         settings_menu.add_command(label="Preferences…", command=self._open_settings)
         self.menubar.add_cascade(label="Settings", menu=settings_menu)
+        build_menu = tk.Menu(self.menubar, tearoff=0)
+        build_menu.add_command(label="Save build definition…", command=self._save_definition)
+        self.menubar.add_cascade(label="Build", menu=build_menu)
         self.menubar.add_command(label="Exit", command=self._on_close)
         self.root.config(menu=self.menubar)
 
@@ -411,6 +1751,7 @@ class PolyglotCombiner:
         self.step2.pack(fill="x", pady=(8, 0))
         self.sec_rows_container = ttk.Frame(self.step2)
         self.sec_rows_container.pack(fill="x", expand=True, padx=4, pady=4)
+        self.thumb_strip = ThumbnailStrip(self.step2, self.cfg["theme"])
 
     def _create_step3_output(self, parent: ttk.Frame):
         self.step3 = ttk.Labelframe(parent, text="Step 4 — Compatibility & Output", style=Theme.LABELFRAME_STYLE)
@@ -432,6 +1773,13 @@ class PolyglotCombiner:
                                                                                                           padx=8)
         ttk.Button(self.output_panel, text="Experiment", command=self._create_experimental,
                    style=Theme.BUTTON_STYLE).grid(row=0, column=4)
+        ttk.Button(self.output_panel, text="Verify", command=self._verify_output,
+                   style=Theme.BUTTON_STYLE).grid(row=0, column=5, padx=(8, 0))
+        ttk.Checkbutton(self.output_panel, text="Reproducible build (sorted entries, fixed timestamps)",
+                        variable=self.reproducible, command=self._refresh_all).grid(row=1, column=1, columnspan=5,
+                                                                                    sticky="w", padx=6, pady=(4, 0))
+        self.lbl_plan = ttk.Label(self.output_panel, text="Estimate: —")
+        self.lbl_plan.grid(row=2, column=0, columnspan=6, sticky="w", pady=(4, 0))
         self.stub_wrap = ttk.Labelframe(self.step3, text="Script stub (for Script + Payload)",
                                         style=Theme.LABELFRAME_STYLE)
         self.stub_wrap.pack(fill="x", padx=6, pady=(0, 8))
@@ -447,6 +1795,9 @@ class PolyglotCombiner:
         self.txt_stub = tk.Text(self.stub_wrap, height=8, wrap="word")
         self.txt_stub.pack(fill="both", expand=True, padx=6, pady=6)
         Theme.apply_to_widget(self.txt_stub, self.cfg["theme"], "text")
+        # The estimate depends on the stub length and on the output suffix (.py outputs embed __main__.py)
+        self.txt_stub.bind("<<Modified>>", self._on_stub_modified)
+        self.output_path.trace_add("write", lambda *_: self._schedule_plan())
 
     def _create_preview_panel(self, parent: ttk.Frame):
         prev = ttk.Labelframe(parent, text="Preview", style=Theme.LABELFRAME_STYLE)
@@ -500,7 +1851,7 @@ class PolyglotCombiner:
 
     def _update_combo_ui(self):
         self.primary_path = None;
-        self.secondary_paths.clear()
+        self.selection.clear()
         self.lbl_primary.config(text="No file chosen");
         self._clear_preview()
         combo = AppConfig.COMBINATIONS[self.cmb_combo.current()]
@@ -512,6 +1863,7 @@ class PolyglotCombiner:
                 anchor="w")
         else:
             for type_name in sec_types: self._add_secondary_row(type_name)
+        self._refresh_thumbnails()
         is_script_combo = combo["primary"] == "SCRIPT" and self.strategy == "Script+ZIP"
         if is_script_combo:
             self.stub_wrap.pack(fill="x", padx=6, pady=(0, 8)); self._load_stub()
@@ -566,21 +1918,24 @@ class PolyglotCombiner:
     def _pick_secondaries(self, type_name: str, var: tk.StringVar):
         files = filedialog.askopenfilenames(title=f"Add {type_name} files", filetypes=filters_for(type_name))
         if not files: return
-        paths = [Path(f) for f in files if Path(f).exists() and Path(f).is_file()]
-        if self.primary_path: paths = [p for p in paths if p.resolve() != self.primary_path.resolve()]
-        self.secondary_paths[type_name] = paths
-        if paths:
-            display_text = ", ".join(p.name for p in paths[:3])
-            if len(paths) > 3: display_text += f" (+{len(paths) - 3} more)"
-            var.set(display_text)
-        else:
-            var.set("— none —")
-        self._refresh_all()
+        self.selection.clear(type_name)
+        primary_id = SelectionStore.identity(self.primary_path) if self.primary_path else None
+        self.selection.add(files, type_name, exclude=primary_id)
+        var.set(self.selection.summary(type_name))
+        self._refresh_thumbnails(); self._refresh_all()
 
     def _clear_secondaries(self, type_name: str, var: tk.StringVar):
-        self.secondary_paths[type_name] = [];
+        self.selection.clear(type_name);
         var.set("— none —");
-        self._refresh_all()
+        self._refresh_thumbnails(); self._refresh_all()
+
+    def _refresh_thumbnails(self):
+        image_paths = [p for t in ("JPEG", "PNG", "GIF") for p in self.selection.paths(t)]
+        self.thumb_strip.set_paths(image_paths if PIL_OK else [])
+        if PIL_OK and image_paths:
+            self.thumb_strip.pack(fill="x", padx=4, pady=(0, 4))
+        else:
+            self.thumb_strip.pack_forget()
 
     def _choose_output(self):
         combo = AppConfig.COMBINATIONS[self.cmb_combo.current()]
@@ -603,23 +1958,35 @@ class PolyglotCombiner:
         if not out_str: messagebox.showerror("Error", "Please choose an output file location."); return
         output_path = Path(out_str)
         try:
-            payload_pairs = [(p.name, p) for paths in self.secondary_paths.values() for p in paths]
-            zip_payload = FileCombiner.create_zip_payload(payload_pairs)
-            if self.strategy == "ZIP-last":
-                if combo["primary"] == "ZIP" and not self.primary_path:
-                    output_path.write_bytes(zip_payload)
-                else:
-                    FileCombiner.write_zip_last(self.primary_path, zip_payload, output_path)
-            else:
-                stub_text = self.txt_stub.get("1.0", "end-1c")
-                FileCombiner.write_script_zip(stub_text, zip_payload, output_path)
-            messagebox.showinfo("Success",
-                                f"Created: {output_path.name}\nSize: {human_size(output_path.stat().st_size)}")
+            payload_pairs = self.selection.pairs()
+            stub_text = self.txt_stub.get("1.0", "end-1c") if self.strategy == "Script+ZIP" else ""
+            result = FileCombiner.build(self.strategy, self.primary_path, payload_pairs, output_path, stub_text,
+                                        self.reproducible.get())
+            status = "Unchanged (skipped writing)" if result["skipped"] else "Created"
+            messagebox.showinfo("Success", f"{status}: {output_path.name}\nSize: {human_size(result['size'])}\n"
+                                           f"SHA-256: {result['sha256']}")
         except (IOError, OSError, zipfile.BadZipFile) as e:
             messagebox.showerror("File Error", f"Failed to create the output file: {e}")
         except Exception as e:
             messagebox.showerror("Error", f"An unexpected error occurred: {e}")
 
+    def _save_definition(self):
+        combo = AppConfig.COMBINATIONS[self.cmb_combo.current()]
+        out_str = self.output_path.get().strip()
+        if not out_str: messagebox.showerror("Error", "Please choose an output file location."); return
+        defn = {"combination": combo["label"], "primary": str(self.primary_path) if self.primary_path else None,
+                "secondaries": {t: list(self.selection.paths(t)) for t in self.selection.types()},
+                "output": os.path.abspath(out_str), "reproducible": self.reproducible.get()}
+        if self.strategy == "Script+ZIP": defn["stub"] = self.txt_stub.get("1.0", "end-1c")
+        target = filedialog.asksaveasfilename(title="Save build definition", defaultextension=".json",
+                                              initialfile=f"{Path(out_str).stem}.build.json",
+                                              filetypes=[("Build definition", "*.json"), ("All files", "*.*")])
+        if not target: return
+        try:
+            BuildDefinition.save(defn, Path(target))
+        except (IOError, OSError, TypeError) as e:
+            messagebox.showerror("Error", f"Failed to save the build definition: {e}")
+
     def _create_experimental(self):
         self._create()
         out_str = self.output_path.get().strip()
@@ -636,6 +2003,13 @@ class PolyglotCombiner:
         except (IOError, OSError) as e:
             messagebox.showerror("Experiment Failed", f"Failed to create the sibling .zip file: {e}")
 
+    def _verify_output(self):
+        out_str = self.output_path.get().strip()
+        if not out_str or not Path(out_str).exists(): messagebox.showerror("Error", "Create the output file first."); return
+        primary_type = AppConfig.COMBINATIONS[self.cmb_combo.current()]["primary"]
+        report = PolyglotVerifier.verify(Path(out_str), primary_type)
+        (messagebox.showinfo if report["ok"] else messagebox.showwarning)("Verify", PolyglotVerifier.summarize(report))
+
     def _refresh_all(self):
         combo = AppConfig.COMBINATIONS[self.cmb_combo.current()]
         if combo["strategy"] == "ZIP-last":
@@ -648,9 +2022,47 @@ class PolyglotCombiner:
                 text="The file runs as a script. The same file can also be opened with an archive tool to access the payload.")
         if self.primary_path or combo["primary"] == "ZIP":
             self.output_panel.pack(fill="x", padx=6, pady=(4, 8))
+            self._start_plan()
         else:
             self.output_panel.pack_forget()
 
+    def _on_stub_modified(self, _event=None):
+        if not self.txt_stub.edit_modified(): return
+        self.txt_stub.edit_modified(False)  # re-arm <<Modified>> for the next edit
+        self._schedule_plan()
+
+    def _schedule_plan(self):
+        """Debounced re-estimate for typing in the stub or output fields."""
+        if self.plan_after_id: self.root.after_cancel(self.plan_after_id)
+        self.plan_after_id = self.root.after(300, self._replan_if_visible)
+
+    def _replan_if_visible(self):
+        self.plan_after_id = None
+        if self.primary_path or AppConfig.COMBINATIONS[self.cmb_combo.current()]["primary"] == "ZIP":
+            self._start_plan()
+
+    def _start_plan(self):
+        """Runs BuildPlanner off the UI thread; only the newest request updates the label."""
+        self.plan_generation += 1
+        generation = self.plan_generation
+        stub_text = self.txt_stub.get("1.0", "end-1c") if self.strategy == "Script+ZIP" else ""
+        args = (self.strategy, self.primary_path, list(self.selection.records()), stub_text, self.reproducible.get(),
+                self.output_path.get().strip().lower().endswith(".py"))
+        self.lbl_plan.config(text="Estimate: calculating…")
+        self.root.after(100, self._poll_plan, generation, self.plan_pool.submit(BuildPlanner.plan, *args))
+
+    def _poll_plan(self, generation: int, future):
+        if generation != self.plan_generation: return
+        if not future.done(): self.root.after(100, self._poll_plan, generation, future); return
+        try:
+            plan = future.result()
+            self.lbl_plan.config(text=f"Estimate: payload ~{human_size(plan['predicted_payload_bytes'])}, "
+                                      f"output ~{human_size(plan['predicted_output_bytes'])}, "
+                                      f"build ~{plan['predicted_seconds']:.1f} s ({plan['entries']} files, "
+                                      f"{human_size(plan['input_bytes'])} in)")
+        except Exception as e:
+            self.lbl_plan.config(text=f"Estimate unavailable: {e}")
+
     def _load_stub(self):
         self._set_stub_text(AppConfig.SCRIPT_TEMPLATES.get(self.stub_template.get(), "# No template found"))
 
@@ -682,7 +2094,9 @@ class PolyglotCombiner:
         self.prev_text.config(state="disabled")
 
     def _on_close(self):
-        self._save_config(); self.root.destroy()
+        self._save_config(); self.thumb_strip.shutdown(); self.plan_pool.shutdown(wait=False, cancel_futures=True)
+        if self.plan_after_id: self.root.after_cancel(self.plan_after_id)
+        self.root.destroy()
 
 
 # --------------------------------##-----UI Panels (Refactored) --------#
@@ -690,6 +2104,7 @@ class QuickZipPanel(ttk.Frame):
     def __init__(self, parent, theme_name: str, **kwargs):
         super().__init__(parent, **kwargs)
         self.theme_name = theme_name;
+        self.selection = SelectionStore();
         self._build()
 
     def _build(self):
@@ -711,27 +2126,140 @@ class QuickZipPanel(ttk.Frame):
 
     def _add_files(self):
         files = filedialog.askopenfilenames(title="Add files to ZIP", filetypes=AppConfig.FILE_FILTERS_ALL)
-        for f in files: self.lb_zip.insert("end", f)
+        start = len(self.selection)
+        self.selection.add(files)
+        new_paths = [self.selection.path_at(i) for i in range(start, len(self.selection))]
+        if new_paths: self.lb_zip.insert("end", *new_paths)
 
     def _remove_selected(self):
-        for i in reversed(self.lb_zip.curselection()): self.lb_zip.delete(i)
+        selected = self.lb_zip.curselection()
+        self.selection.remove_indices(selected)
+        for i in reversed(selected): self.lb_zip.delete(i)
 
     def _create_zip(self):
-        items = self.lb_zip.get(0, "end")
-        if not items: messagebox.showwarning("Empty", "No files to zip."); return
+        if not len(self.selection): messagebox.showwarning("Empty", "No files to zip."); return
         target = filedialog.asksaveasfilename(title="Create ZIP", defaultextension=".zip", initialfile="archive.zip",
                                               filetypes=[("ZIP files", "*.zip"), ("All files", "*.*")])
         if not target: return
         try:
             with zipfile.ZipFile(target, "w", compression=zipfile.ZIP_DEFLATED) as zf:
-                for f in items:
-                    p = Path(f)
-                    if p.is_file(): zf.write(p, p.name)
+                for arcname, p in self.selection.pairs():
+                    if p.is_file(): zf.write(p, arcname)
             messagebox.showinfo("Success", f"ZIP created: {Path(target).name}")
         except (IOError, OSError, zipfile.BadZipFile) as e:
             messagebox.showerror("Error", f"Failed to create ZIP: {e}")
 
 
+class ThumbnailStrip(ttk.Frame):
+    """Scrollable thumbnail grid; only the rows in view hold Tk images, so hundreds of files stay cheap."""
+    PAD = 8
+    LABEL_H = 16
+
+    def __init__(self, parent, theme_name: str, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.theme_name = theme_name
+        self.paths: List[str] = []
+        self.thumb_files: Dict[int, Path] = {}
+        self.photos: Dict[int, tk.PhotoImage] = {}
+        self.pending: Dict[object, int] = {}
+        self.generation = 0;
+        self.cols = 1
+        self.pool: Optional[ThreadPoolExecutor] = None
+        self._build()
+
+    @property
+    def cell_w(self) -> int:
+        return AppConfig.THUMB_SIZE + self.PAD
+
+    @property
+    def cell_h(self) -> int:
+        return AppConfig.THUMB_SIZE + self.PAD + self.LABEL_H
+
+    def _build(self):
+        self.lbl_title = ttk.Label(self, text="Image thumbnails")
+        self.lbl_title.pack(anchor="w")
+        wrap = ttk.Frame(self);
+        wrap.pack(fill="x")
+        wrap.columnconfigure(0, weight=1)
+        self.canvas = tk.Canvas(wrap, height=2 * self.cell_h + self.PAD, yscrollincrement=self.cell_h)
+        yscroll = ttk.Scrollbar(wrap, orient="vertical", command=self._on_scroll)
+        self.canvas.configure(yscrollcommand=yscroll.set)
+        self.canvas.grid(row=0, column=0, sticky="ew");
+        yscroll.grid(row=0, column=1, sticky="ns")
+        self.canvas.bind("<Configure>", lambda e: self._layout())
+        self.canvas.bind("<MouseWheel>", lambda e: self._on_scroll("scroll", -1 if e.delta > 0 else 1, "units"))
+        self.canvas.bind("<Button-4>", lambda e: self._on_scroll("scroll", -1, "units"))
+        self.canvas.bind("<Button-5>", lambda e: self._on_scroll("scroll", 1, "units"))
+        self.apply_theme(self.theme_name)
+
+    def apply_theme(self, theme_name: str):
+        self.theme_name = theme_name; Theme.apply_to_widget(self.canvas, self.theme_name, "canvas")
+        self._redraw()
+
+    def set_paths(self, paths: List[str]):
+        self.generation += 1
+        for fut in self.pending: fut.cancel()
+        self.pending.clear(); self.thumb_files.clear(); self.photos.clear()
+        self.paths = list(paths)
+        self.lbl_title.config(text=f"Image thumbnails ({len(self.paths)})")
+        if self.paths:
+            if self.pool is None:  # Pillow releases the GIL while decoding, so threads scale
+                self.pool = ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 2), thread_name_prefix="thumb")
+                self.pool.submit(ThumbnailCache.evict)
+            for i, p in enumerate(self.paths): self.pending[self.pool.submit(ThumbnailCache.get_or_create, Path(p))] = i
+            self.after(100, self._poll, self.generation)
+        self.canvas.yview_moveto(0);
+        self._layout()
+
+    def shutdown(self):
+        self.generation += 1
+        if self.pool: self.pool.shutdown(wait=False, cancel_futures=True)
+
+    def _poll(self, generation: int):
+        if generation != self.generation: return
+        finished = [fut for fut in self.pending if fut.done()]
+        for fut in finished:
+            idx = self.pending.pop(fut)
+            if not fut.cancelled() and fut.result(): self.thumb_files[idx] = fut.result()
+        if finished: self._redraw()
+        if self.pending: self.after(100, self._poll, generation)
+
+    def _on_scroll(self, *args):
+        self.canvas.yview(*args); self._redraw()
+
+    def _layout(self):
+        width = self.canvas.winfo_width()
+        self.cols = max(1, (width - self.PAD) // self.cell_w)
+        rows = -(-len(self.paths) // self.cols)
+        self.canvas.configure(scrollregion=(0, 0, width, rows * self.cell_h + self.PAD))
+        self._redraw()
+
+    def _redraw(self):
+        self.canvas.delete("thumb")
+        if not self.paths: return
+        palette = Theme.get_palette(self.theme_name)
+        top = int(self.canvas.canvasy(0))
+        first = (top // self.cell_h) * self.cols
+        last = min(len(self.paths), ((top + self.canvas.winfo_height()) // self.cell_h + 1) * self.cols)
+        self.photos = {i: ph for i, ph in self.photos.items() if first <= i < last}  # free off-screen images
+        for i in range(first, last):
+            x = self.PAD + (i % self.cols) * self.cell_w
+            y = self.PAD + (i // self.cols) * self.cell_h
+            size = AppConfig.THUMB_SIZE
+            if i in self.thumb_files and i not in self.photos:
+                try:
+                    self.photos[i] = tk.PhotoImage(file=str(self.thumb_files[i]))
+                except tk.TclError:
+                    self.thumb_files.pop(i)
+            if i in self.photos:
+                self.canvas.create_image(x + size // 2, y + size // 2, image=self.photos[i], tags="thumb")
+            else:
+                self.canvas.create_rectangle(x, y, x + size, y + size, outline=palette["lbl_frame_border"], tags="thumb")
+            name = os.path.basename(self.paths[i])
+            self.canvas.create_text(x + size // 2, y + size + self.LABEL_H // 2, tags="thumb", fill=palette["fg"],
+                                    text=name if len(name) <= 14 else name[:13] + "…", font=("Segoe UI", 8))
+
+
 class ZipInspectorPanel(ttk.Frame):
     COLUMNS = ("name", "size", "packed", "ratio", "modified")
 
@@ -844,8 +2372,83 @@ class ZipInspectorPanel(ttk.Frame):
 
 
 # --------------------------------##-----main --------#
+def run_cli(argv: List[str]) -> int:
+    """Headless entry point for batch pipelines; prints JSON reports to stdout."""
+    parser = argparse.ArgumentParser(prog=Path(sys.argv[0]).name, description=AppConfig.APP_NAME)
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_verify = sub.add_parser("verify", help="Check primary-format sanity and payload CRCs of built files")
+    p_verify.add_argument("files", nargs="+", type=Path)
+    p_verify.add_argument("--type", dest="primary_type", choices=list(AppConfig.SUPPORTED_TYPES),
+                          help="Primary type (default: from the file extension)")
+    p_verify.add_argument("--workers", type=int, default=None, help="Threads for large-entry CRC checks")
+    p_build = sub.add_parser("build", help="Build saved build definitions (JSON)")
+    p_build.add_argument("definitions", nargs="+", type=Path)
+    p_watch = sub.add_parser("watch", help="Rebuild saved build definitions whenever their inputs change")
+    p_watch.add_argument("definitions", nargs="+", type=Path)
+    p_watch.add_argument("--poll", action="store_true", help="Poll file stats instead of using inotify")
+    p_watch.add_argument("--interval", type=float, default=1.0, help="Polling interval in seconds")
+    p_watch.add_argument("--debounce", type=float, default=0.5, help="Quiet period before rebuilding, in seconds")
+    p_plan = sub.add_parser("plan", help="Predict payload size, output size and build time of build definitions")
+    p_plan.add_argument("definitions", nargs="+", type=Path)
+    p_plan.add_argument("--recalibrate", action="store_true", help="Re-measure this machine's throughput first")
+    p_serve = sub.add_parser("serve", help="Run the local build service (HTTP on 127.0.0.1)")
+    p_serve.add_argument("--port", type=int, default=8765)
+    p_serve.add_argument("--workers", type=int, default=4)
+    p_serve.add_argument("--max-queue", type=int, default=256, help="Pending jobs accepted before rejecting with 503")
+    p_serve.add_argument("--allow-dir", action="append", type=Path, dest="allowed_dirs",
+                         help="Directory that build outputs and extractions may write into (repeatable; "
+                              "default: the current directory)")
+    p_index = sub.add_parser("index-pdf", help="Index page counts and metadata of the PDFs in a directory")
+    p_index.add_argument("directory", type=Path)
+    p_index.add_argument("--recursive", action="store_true")
+    p_index.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    if args.command == "verify":
+        reports = [PolyglotVerifier.verify(f, args.primary_type, args.workers) for f in args.files]
+        print(json.dumps(reports, indent=2))
+        return 0 if all(r["ok"] for r in reports) else 1
+    if args.command == "build":
+        results = []
+        for def_path in args.definitions:
+            try:
+                results.append(dict(BuildDefinition.run(BuildDefinition.load(def_path)), definition=str(def_path)))
+            except (IOError, OSError, ValueError, KeyError, zipfile.BadZipFile) as e:
+                results.append({"definition": str(def_path), "error": str(e)})
+        print(json.dumps(results, indent=2))
+        return 0 if all("error" not in r for r in results) else 1
+    if args.command == "watch":
+        try:
+            BuildWatcher(args.definitions, args.debounce, args.poll, args.interval).run()
+        except KeyboardInterrupt:
+            pass
+        return 0
+    if args.command == "plan":
+        if args.recalibrate: BuildPlanner.calibration(recalibrate=True)
+        plans = []
+        for def_path in args.definitions:
+            try:
+                plans.append(dict(BuildDefinition.plan(BuildDefinition.load(def_path)), definition=str(def_path)))
+            except (IOError, OSError, ValueError, KeyError) as e:
+                plans.append({"definition": str(def_path), "error": str(e)})
+        print(json.dumps(plans, indent=2))
+        return 0 if all("error" not in p for p in plans) else 1
+    if args.command == "serve":
+        try:
+            serve(args.port, args.workers, args.max_queue, args.allowed_dirs)
+        except KeyboardInterrupt:
+            pass
+        return 0
+    if args.command == "index-pdf":
+        entries = PdfInspector.index_directory(args.directory, args.recursive, args.workers)
+        print(json.dumps(entries, indent=2))
+        return 0 if all("error" not in e for e in entries) else 1
+    return 2
+
+
 def main():
-    """Initializes and runs the application."""
+    """Initializes and runs the application (or the batch CLI when arguments are given)."""
+    if len(sys.argv) > 1: sys.exit(run_cli(sys.argv[1:]))
     root = tk.Tk()
     app = PolyglotCombiner(root)
     root.mainloop()